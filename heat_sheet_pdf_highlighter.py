@@ -1,16 +1,18 @@
+from __future__ import annotations
+
+import contextlib
 import csv
 import datetime
+import functools
 import gettext
 import json
 import os
 import pickle
 import re
 import time
-import subprocess
 import sys
-import tempfile
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import IntEnum
 from io import BytesIO
 from pathlib import Path
@@ -21,6 +23,7 @@ from tkinter import (
     IntVar,
     Label,
     StringVar,
+    TclError,
     Text,
     Tk,
     Toplevel,
@@ -29,11 +32,14 @@ from tkinter import (
     messagebox,
     ttk,
 )
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 
-import requests
 from PIL import Image, ImageTk
-from pymupdf import Document, Page, Rect, utils
+
+if TYPE_CHECKING:
+    # pymupdf and requests are imported where they are needed, loading them noticeably slows down the start of the app
+    import requests
+    from pymupdf import Page, Rect
 
 ######################################################################
 # Constants
@@ -41,15 +47,31 @@ APP_NAME = "Heat Sheet PDF Highlighter"
 VERSION_STR = "1.1.1"
 
 CACHE_EXPIRY = datetime.timedelta(days=1)
+MAX_CACHE_EXPIRY = datetime.timedelta(days=7)
+CACHE_EXPIRY_GROWTH = 1.5  # factor applied to the cache expiry each time a check finds no new release
+DOWNLOAD_CHUNK_SIZE = 128 * 1024  # bytes read from the network per iteration when downloading the installer
+HTTP_TIMEOUT = (5, 30)  # seconds to wait for connecting to and for data from GitHub
+
+GITHUB_LATEST_RELEASE_URL = "https://api.github.com/repos/jonalbr/heat-sheet-pdf-highlighter/releases/latest"
+GITHUB_RELEASES_URL = "https://api.github.com/repos/jonalbr/heat-sheet-pdf-highlighter/releases"
 
 
 ######################################################################
-@dataclass
+VERSION_NUMBERS_PATTERN = re.compile(r"\d+")
+
+
+@dataclass(frozen=True, slots=True, order=True)
 class Version:
-    major: int = 0
-    minor: int = 0
-    patch: int = 0
-    rc: int = None
+    major: int = field(default=0, compare=False)
+    minor: int = field(default=0, compare=False)
+    patch: int = field(default=0, compare=False)
+    rc: int = field(default=None, compare=False)
+    # Versions are compared by this tuple only, so it is built once instead of on every comparison
+    _key: tuple = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # The dataclass is frozen, so the key has to be set through object.__setattr__
+        object.__setattr__(self, "_key", (self.major, self.minor, self.patch, self.rc if self.rc is not None else -1))
 
     def __str__(self):
         if self.rc:
@@ -58,9 +80,11 @@ class Version:
             return f"{self.major}.{self.minor}.{self.patch}"
 
     @classmethod
+    @functools.lru_cache(maxsize=256)
     def from_str(cls, version: str):
         """
         Create a Version object from a version string in the format 'X.Y.Z' or 'X.Y.Z-rcN'.
+        Results are cached, which is safe as Version objects are immutable.
 
         Args:
             version (str): The version string.
@@ -69,7 +93,7 @@ class Version:
             Version: The Version object.
         """
         # Extract the version numbers and the optional rc number
-        parts = re.findall(r"\d+", version)
+        parts = VERSION_NUMBERS_PATTERN.findall(version)
 
         # Convert the version numbers to integers
         major = int(parts[0])
@@ -81,16 +105,6 @@ class Version:
 
         return cls(major, minor, patch, rc)
 
-    def __lt__(self, other):
-        self_rc = self.rc if self.rc is not None else -1
-        other_rc = other.rc if other.rc is not None else -1
-        return (self.major, self.minor, self.patch, self_rc) < (other.major, other.minor, other.patch, other_rc)
-
-    def __gt__(self, other):
-        self_rc = self.rc if self.rc is not None else -1
-        other_rc = other.rc if other.rc is not None else -1
-        return (self.major, self.minor, self.patch, self_rc) > (other.major, other.minor, other.patch, other_rc)
-
 
 ######################################################################
 # Supported languages
@@ -103,6 +117,8 @@ language_options = ["en", "de"]  # Add more languages as needed
 class AppSettings:
     def __init__(self, settings_file: Path):
         self.settings_file = settings_file
+        self.defer_save = False
+        self.unsaved_changes = False
         self.default_settings = {
             "version": VERSION_STR,
             "search_str": "",
@@ -138,9 +154,28 @@ class AppSettings:
         self.settings_file.write_text(json.dumps(self.settings, indent=4))
 
     def update_setting(self, key, value):
-        """Update a specific setting and save the file."""
+        """Update a specific setting and save the file, unless saving is deferred by batch_update."""
         self.settings[key] = value
-        self.save_settings()
+        if self.defer_save:
+            self.unsaved_changes = True
+        else:
+            self.save_settings()
+
+    @contextlib.contextmanager
+    def batch_update(self):
+        """Defer saving the file while several settings are updated and save it once at the end."""
+        if self.defer_save:
+            # Already inside a batch, the outermost one saves the file
+            yield
+            return
+        self.defer_save = True
+        try:
+            yield
+        finally:
+            self.defer_save = False
+            if self.unsaved_changes:
+                self.unsaved_changes = False
+                self.save_settings()
 
     def validate_settings(self, settings: Dict = None):
         """
@@ -237,18 +272,21 @@ def get_settings_path():
 #######################################################################
 # Paths
 
+# Directory of this file, resolved once
+app_dir = Path(__file__).resolve().parent
+
 # get the bundle dir if bundled or simply the __file__ dir if not bundled
-bundle_dir = getattr(sys, "_MEIPASS", Path(__file__).resolve().parent)  # get the bundle dir if bundled or simply the __file__ dir if not bundled
+bundle_dir = getattr(sys, "_MEIPASS", app_dir)  # get the bundle dir if bundled or simply the __file__ dir if not bundled
 locales_dir = Path(bundle_dir) / "locales"  # get the locales dir
 
 # Add the path to the Breeze theme
-tcl_lib_path = Path(__file__).resolve().parent / "assets" / "ttk-Breeze-0.6"
+tcl_lib_path = app_dir / "assets" / "ttk-Breeze-0.6"
 
 # Add the path to the icon
-icon_path = Path(__file__).resolve().parent / "assets" / "icon_no_background.ico"
+icon_path = app_dir / "assets" / "icon_no_background.ico"
 
 # Add the path to the logo
-logo_path = Path(__file__).resolve().parent / "assets" / "logo_no_background.png"
+logo_path = app_dir / "assets" / "logo_no_background.png"
 
 # File path for the settings
 settings_path = get_settings_path()
@@ -256,8 +294,177 @@ SETTINGS_FILE = settings_path / "settings.json"
 
 CACHE_FILE = settings_path / "update_check_cache.pkl"
 
+RELEASES_CACHE_FILE = settings_path / "releases_cache.json"
+
 # Add the path to the update script
-UPDATE_SCRIPT_PATH = Path(__file__).resolve().parent / "update_app.bat"
+UPDATE_SCRIPT_PATH = app_dir / "update_app.bat"
+
+#####################################################################################
+# Localization
+
+
+@functools.lru_cache(maxsize=8)
+def get_translation(*languages: str):
+    """
+    Get the translation for the given languages. Translations are cached, so switching the language does not
+    reload the catalog from disk. Falls back to the untranslated strings if no catalog is found.
+
+    Args:
+        *languages (str): The language codes to look up, in order of preference.
+
+    Returns:
+        gettext.NullTranslations: The translation.
+    """
+    return gettext.translation("base", localedir=locales_dir, languages=list(languages), fallback=True)
+
+
+#####################################################################################
+# HTTP session
+
+_http_session = None
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the HTTP session shared by all requests to GitHub, so connections are kept alive between the update check
+    and the installer download instead of doing a new TCP and TLS handshake for every request.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        # Retry transient server errors on the kept-alive connection instead of failing the update check
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        # Keep connections to both the GitHub API and the host serving the release downloads
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retries))
+        session.headers["User-Agent"] = f"heat-sheet-pdf-highlighter/{VERSION_STR}"
+        _http_session = session
+    return _http_session
+
+
+#####################################################################################
+# GitHub releases
+
+
+def select_installer_url(release: Dict):
+    """
+    Get the download URL of the installer of a GitHub release.
+
+    Args:
+        release (Dict): The release information from the GitHub API.
+
+    Returns:
+        str: The download URL of the first .exe asset, or of the first asset if there is no .exe asset.
+            None if the release has no assets.
+    """
+    assets = release.get("assets", ())
+    for asset in assets:
+        name = asset.get("name", "")
+        # Only lowercase the extension, not the whole name
+        if name[name.rfind(".") :].lower() == ".exe":
+            return asset["browser_download_url"]
+    return assets[0]["browser_download_url"] if assets else None
+
+
+#####################################################################################
+# Update cache
+
+
+def load_update_cache():
+    """
+    Load the result of the last update check from the cache file.
+
+    Returns:
+        Tuple[datetime.datetime, Version, datetime.timedelta]: The time of the last check, the latest version
+            found and how long the result stays valid, or (None, None, CACHE_EXPIRY) if there is no usable cache.
+    """
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            # Caches written by older versions do not contain the expiry
+            cache_time, latest_version, *cache_expiry = pickle.load(f)
+    except FileNotFoundError:
+        return None, None, CACHE_EXPIRY
+    except (pickle.UnpicklingError, EOFError, AttributeError, TypeError, ValueError):
+        # Corrupt or outdated cache, treat it as a cache miss
+        return None, None, CACHE_EXPIRY
+
+    if isinstance(latest_version, str):
+        latest_version = Version.from_str(latest_version)
+    elif latest_version:
+        # Caches written by older versions pickled the Version object itself, which does not unpickle into
+        # the current Version class correctly, so treat it as a cache miss
+        return None, None, CACHE_EXPIRY
+    cache_expiry = cache_expiry[0] if cache_expiry else CACHE_EXPIRY
+    return cache_time, latest_version, cache_expiry
+
+
+def next_cache_expiry(
+    cached_version: Version, latest_version: Version, current_version: Version, cache_expiry: datetime.timedelta
+):
+    """
+    Determine how long the result of an update check stays valid.
+
+    Every check that finds the same release as the previous one extends the expiry, up to MAX_CACHE_EXPIRY,
+    so rarely released versions cause fewer requests. A new release, a failed check or a pending update resets
+    it to CACHE_EXPIRY, so the user is asked about the update again the next day.
+
+    Args:
+        cached_version (Version): The latest version found by the previous check.
+        latest_version (Version): The latest version found by the current check.
+        current_version (Version): The version of the running app.
+        cache_expiry (datetime.timedelta): The expiry of the previous check.
+
+    Returns:
+        datetime.timedelta: The expiry for the current check.
+    """
+    if not latest_version or latest_version != cached_version or latest_version > current_version:
+        return CACHE_EXPIRY
+    return min(cache_expiry * CACHE_EXPIRY_GROWTH, MAX_CACHE_EXPIRY)
+
+
+def save_update_cache(cache_time: datetime.datetime, latest_version: Version, cache_expiry: datetime.timedelta = CACHE_EXPIRY):
+    """
+    Save the result of an update check to the cache file.
+
+    Args:
+        cache_time (datetime.datetime): The time of the update check.
+        latest_version (Version): The latest version found, or a falsy value if the check failed.
+        cache_expiry (datetime.timedelta): How long the result stays valid.
+    """
+    # Store the version as a string so the cache does not depend on the layout of the Version class
+    with open(CACHE_FILE, "wb") as f:
+        pickle.dump((cache_time, str(latest_version) if latest_version else latest_version, cache_expiry), f)
+
+
+def load_releases_cache() -> Dict:
+    """
+    Load the cached GitHub API responses and their ETags.
+
+    Returns:
+        Dict: The cached responses keyed by URL, each a dict with the keys "etag" and "release_info".
+            An empty dict if there is no usable cache.
+    """
+    try:
+        return json.loads(RELEASES_CACHE_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_releases_cache(releases_cache: Dict):
+    """
+    Save the GitHub API responses and their ETags.
+
+    Args:
+        releases_cache (Dict): The cached responses keyed by URL.
+    """
+    RELEASES_CACHE_FILE.write_text(json.dumps(releases_cache), encoding="utf-8")
+
 
 #####################################################################################
 # PDF Processing functions
@@ -274,6 +481,8 @@ def get_line_bbox(page: Page, match_rect: Rect):
     Returns:
         Rect: The bounding box of the line containing the match rectangle.
     """
+    from pymupdf import Rect, utils
+
     words = utils.get_text(page, "words")
     line_rect = Rect(match_rect)
     match_height = match_rect.y1 - match_rect.y0
@@ -287,6 +496,28 @@ def get_line_bbox(page: Page, match_rect: Rect):
     return line_rect
 
 
+@functools.lru_cache(maxsize=8)
+def compile_line_patterns(search_str: str, names: tuple):
+    """
+    Compile the patterns used to check the lines of a page. The patterns only depend on the search string
+    and the names, so they are compiled once per document instead of once per page.
+
+    Args:
+        search_str (str): The string to search for.
+        names (tuple): The names to filter the data.
+
+    Returns:
+        Tuple[re.Pattern, re.Pattern]: The relevant line pattern and the names pattern.
+    """
+    # Adjusted regex to consider new lines between elements of the pattern
+    relevant_line_pattern = re.compile(
+        r"(?i)(?:Bahn\s)?\d+\s.*?\s" + re.escape(search_str) + r"\s.*?(?:(?:\d{2}[:.,]\d{2}(?:,|\.)\d{2})|(?:\d{2},\d{2})|(?:\d{2}\.\d{2})|NT)",
+        re.DOTALL,  # Allows for matching across multiple lines
+    )
+    names_pattern = re.compile(r"\b(?:{})\b".format("|".join([re.escape(name) for name in names])), re.IGNORECASE)
+    return relevant_line_pattern, names_pattern
+
+
 class HighlightMode(IntEnum):
     ONLY_NAMES = 0
     NAMES_DIFF_COLOR = 1
@@ -319,16 +550,13 @@ def highlight_matching_data(
         Tuple[int, int]: A tuple containing the number of matches found and the number of matches skipped.
 
     """
+    from pymupdf import utils
+
     matches_found = 0
     skipped_matches = 0
     text_instances = utils.search_for(page, search_str)
 
-    # Adjusted regex to consider new lines between elements of the pattern
-    relevant_line_pattern = re.compile(
-        r"(?i)(?:Bahn\s)?\d+\s.*?\s" + re.escape(search_str) + r"\s.*?(?:(?:\d{2}[:.,]\d{2}(?:,|\.)\d{2})|(?:\d{2},\d{2})|(?:\d{2}\.\d{2})|NT)",
-        re.DOTALL,  # Allows for matching across multiple lines
-    )
-    names_pattern = re.compile(r"\b(?:{})\b".format("|".join([re.escape(name) for name in names])), re.IGNORECASE)
+    relevant_line_pattern, names_pattern = compile_line_patterns(search_str, tuple(names))
 
     for inst in text_instances:
         # Increment matches found
@@ -339,7 +567,7 @@ def highlight_matching_data(
             line_text = utils.get_text(page, "text", clip=line_rect)  # Extract text within this rectangle
 
             # Check if the extracted line matches the relevant line pattern
-            if not re.search(relevant_line_pattern, line_text):
+            if not relevant_line_pattern.search(line_text):
                 skipped_matches += 1
                 continue  # Skip highlighting if the line does not match the pattern
 
@@ -416,7 +644,7 @@ class PDFHighlighterApp:
         self.root.tk.call("lappend", "auto_path", tcl_lib_path)
         # self.root.tk.call("package", "require", "ttk::theme::Breeze")
         # Set up internationalization
-        self.lang = gettext.translation("base", localedir=locales_dir, languages=language_options)
+        self.lang = get_translation(*language_options)
         self.lang.install()
         self._ = staticmethod(self.lang.gettext)
         self.n_ = staticmethod(self.lang.ngettext)
@@ -426,8 +654,13 @@ class PDFHighlighterApp:
         # Initialize the settings
         self.app_settings = AppSettings(SETTINGS_FILE)
 
+        # Held while an update check runs, so repeated clicks do not start several checks at once
+        self.update_check_lock = threading.Lock()
+        # Set when the user asks for a check while another one is running, so it runs once that one is done
+        self.pending_forced_check = False
+
         # Check for updates
-        threading.Thread(target=self.check_for_app_updates, daemon=True).start()
+        self.start_update_check()
 
         # Initialize the UI components
         self.setup_ui()
@@ -583,7 +816,8 @@ class PDFHighlighterApp:
         self.update_label = ttk.Label(self.version_frame, text=self.update_label_text, foreground="#5c5c5c", cursor="hand2")
         self.update_label.pack(side="left", padx=10)
 
-        self.update_label.bind("<Button-1>", lambda event: self.check_for_app_updates(current_version, force_check=True))
+        # Check in the background, so the window stays responsive while GitHub is contacted
+        self.update_label.bind("<Button-1>", lambda event: self.start_update_check(current_version, force_check=True))
         # self.update_label.bind("<Button-1>", lambda event: self.test_install_routine())
 
         # make version frame sticky to the bottom
@@ -709,7 +943,7 @@ class PDFHighlighterApp:
         Args:
             language (str): The language code to switch to.
         """
-        self.lang = gettext.translation("base", localedir=locales_dir, languages=[language])
+        self.lang = get_translation(language)
         self.lang.install()
         self._ = staticmethod(self.lang.gettext)
         self.n_ = staticmethod(self.lang.ngettext)
@@ -786,6 +1020,8 @@ class PDFHighlighterApp:
         threading.Thread(target=self.process_pdf, args=(input_file,), daemon=True).start()
 
     def process_pdf(self, input_file: str):
+        from pymupdf import Document
+
         self.processing_active = True
         search_str = self.search_phrase_var.get()
         only_relevant = bool(self.relevant_lines_var.get())
@@ -891,127 +1127,244 @@ class PDFHighlighterApp:
         )
         self.root.update_idletasks()
 
+    def start_update_check(self, current_version: Version = Version.from_str(VERSION_STR), force_check: bool = False):
+        """
+        Start an update check in a background thread. If a check is already running, a forced check is started
+        once it is done, a regular check is dropped.
+
+        Args:
+            current_version (Version): The version of the running app.
+            force_check (bool): Whether to ignore the update cache and report the result even if there is no update.
+        """
+        if not self.update_check_lock.acquire(blocking=False):
+            if force_check:
+                self.pending_forced_check = True
+            return
+        threading.Thread(target=self.check_for_app_updates, args=(current_version, force_check), daemon=True).start()
+
     def check_for_app_updates(self, current_version: Version = Version.from_str(VERSION_STR), force_check: bool = False):
         """
         Check for updates and prompt the user to install if a new version is available.
+
+        Runs in the background thread started by start_update_check, which holds the update check lock. Only the
+        lookup runs here, the result is handed to the Tk thread, which shows the prompt and releases the lock.
+        The lock is always released on the Tk thread, so a check requested meanwhile is never missed.
         """
-        now = datetime.datetime.now()
+        handed_over = False
+        try:
+            now = datetime.datetime.now()
 
-        if not force_check and os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "rb") as f:
-                cache_time, latest_version = pickle.load(f)
-                if now - cache_time < CACHE_EXPIRY:
-                    return latest_version
+            cache_time, cached_version, cache_expiry = load_update_cache()
+            if not force_check:
+                if cache_time is not None and now - cache_time < cache_expiry:
+                    return cached_version
 
-        # Perform the update check...
-        latest_version = self._get_latest_version_from_github(current_version=current_version, force_check=force_check)
+            # Perform the update check...
+            latest_version, download_url, error = self._get_latest_version_from_github()
 
-        # Cache the result
-        with open(CACHE_FILE, "wb") as f:
-            pickle.dump((now, latest_version), f)
+            # Cache the result
+            save_update_cache(now, latest_version, next_cache_expiry(cached_version, latest_version, current_version, cache_expiry))
 
-        # update the version label
-        self.update_version_labels_text(latest_version, current_version)
-        self.update_version_labels()
+            # Tk must only be used from its own thread
+            self.root.after(0, self._finish_update_check, latest_version, download_url, error, current_version, force_check)
+            handed_over = True
+            return latest_version
+        finally:
+            if not handed_over:
+                try:
+                    self.root.after(0, self._release_update_check_lock)
+                except (RuntimeError, TclError):
+                    # The main loop is gone, so no check can be requested anymore
+                    self.update_check_lock.release()
+
+    def _get_latest_version_from_github(self):
+        """
+        Look up the latest version on GitHub and remember it in the settings.
+        Makes no GUI calls, as it runs in the update check thread.
 
-        return latest_version
+        Returns:
+            Tuple[Version, str, Exception]: The latest version, the download URL of its installer and None,
+                or (False, None, error) if the lookup failed.
+        """
+        import requests
 
-    def _get_latest_version_from_github(self, current_version: Version = Version.from_str(VERSION_STR), force_check: bool = False):
-        # GitHub release URL
-        release_url = "https://api.github.com/repos/jonalbr/heat-sheet-pdf-highlighter/releases/latest"
+        # The setting is stored as a string, so compare explicitly ("False" is truthy)
+        beta = self.app_settings.settings["beta"] == "True"
 
         try:
-            # Send GET request to GitHub API
-            response = requests.get(release_url)
-            response.raise_for_status()
-
-            # Parse the response JSON
-            release_info = response.json()
+            if beta:
+                # The list of releases contains the latest release as well as the pre-releases, so one request is enough
+                releases_info = self._fetch_release_info(GITHUB_RELEASES_URL)
+                release_info = next((release for release in releases_info if not release["prerelease"]), None)
+            else:
+                release_info = self._fetch_release_info(GITHUB_LATEST_RELEASE_URL)
 
             # Get the latest version number and download URL
-            latest_version = Version.from_str(release_info["tag_name"])
-            download_url = release_info["assets"][0]["browser_download_url"]
-
-            if self.app_settings.settings["beta"]:
-                release_url = "https://api.github.com/repos/jonalbr/heat-sheet-pdf-highlighter/releases"
+            if release_info is not None:
+                latest_version = Version.from_str(release_info["tag_name"])
+                download_url = select_installer_url(release_info)
+            else:
+                # There are only pre-releases
+                latest_version = Version()
+                download_url = None
+
+            # Write the settings file once for all of the updates below
+            with self.app_settings.batch_update():
+                if beta:
+                    # Get the latest pre-release by version, independent of the order GitHub returns them in
+                    latest_pre_release = max(
+                        (release for release in releases_info if release["prerelease"]),
+                        key=lambda release: Version.from_str(release["tag_name"]),
+                        default=None,
+                    )
 
-                # Send GET request to GitHub API
-                response = requests.get(release_url)
-                response.raise_for_status()
+                    # If there are no pre-releases, return None or handle accordingly
+                    if latest_pre_release is not None:
+                        # Get the latest pre-release version number
+                        latest_pre_release_version = Version.from_str(latest_pre_release["tag_name"])
+
+                        # If the latest pre-release is newer than the latest release, update the latest version and download URL
+                        if latest_pre_release_version > latest_version:
+                            latest_version = latest_pre_release_version
+                            download_url = select_installer_url(latest_pre_release)
+                            self.app_settings.update_setting("newest_version_available", str(latest_version))
+                            self.app_settings.update_setting("ask_for_update", True)
+                    else:
+                        self.app_settings.update_setting("newest_version_available", str(latest_version))
+                        self.app_settings.update_setting("ask_for_update", True)
 
-                # Parse the response JSON
-                releases_info = response.json()
+                # reset ask_for_update if newer version than in newest_version_available is found
+                if latest_version > Version.from_str(self.app_settings.settings["newest_version_available"]):
+                    self.app_settings.update_setting("ask_for_update", True)
+                    # safe the newest version in the settings
+                    self.app_settings.update_setting("newest_version_available", str(latest_version))
 
-                # Filter the releases to only include pre-releases
-                pre_releases = [release for release in releases_info if release["prerelease"]]
+            return latest_version, download_url, None
+        except requests.exceptions.RequestException as e:
+            return False, None, e
 
-                # If there are no pre-releases, return None or handle accordingly
-                if pre_releases:
-                    # Get the latest pre-release (the first one in the list as GitHub returns them in reverse chronological order)
-                    latest_pre_release = pre_releases[0]
+    def _finish_update_check(
+        self, latest_version: Version, download_url: str, error: Exception, current_version: Version, force_check: bool
+    ):
+        """
+        Show the result of an update check on the Tk thread and release the update check lock.
 
-                    # Get the latest pre-release version number
-                    latest_pre_release_version = Version.from_str(latest_pre_release["tag_name"])
+        Args:
+            latest_version (Version): The latest version found, or False if the check failed.
+            download_url (str): The download URL of the installer of the latest version.
+            error (Exception): The error the check failed with, or None.
+            current_version (Version): The version of the running app.
+            force_check (bool): Whether the user asked for the check.
+        """
+        retry = False
+        try:
+            # update the version label
+            self.update_version_labels_text(latest_version, current_version)
+            self.update_version_labels()
 
-                    # If the latest pre-release is newer than the latest release, update the latest version and download URL
-                    if latest_pre_release_version > latest_version:
-                        latest_version = latest_pre_release_version
-                        download_url = latest_pre_release["assets"][0]["browser_download_url"]
-                        self.app_settings.update_setting("newest_version_available", str(latest_version))
-                        self.app_settings.update_setting("ask_for_update", True)
+            if error is not None:
+                if force_check:
+                    # Handle any errors that occur during the update check
+                    retry = messagebox.askretrycancel(self._("Update Error"), self._("Failed to check for updates: {0}").format(str(error)))
                 else:
-                    self.app_settings.update_setting("newest_version_available", str(latest_version))
-                    self.app_settings.update_setting("ask_for_update", True)
+                    print(f"Failed to check for updates: {str(error)}")
+            else:
+                self._prompt_for_update(latest_version, download_url, current_version, force_check)
+        finally:
+            if retry:
+                # The retry takes the place of any check requested meanwhile
+                self.pending_forced_check = False
+            self._release_update_check_lock()
 
-            # reset ask_for_update if newer version than in newest_version_available is found
-            if latest_version > Version.from_str(self.app_settings.settings["newest_version_available"]):
-                self.app_settings.update_setting("ask_for_update", True)
-                # safe the newest version in the settings
-                self.app_settings.update_setting("newest_version_available", str(latest_version))
-
-            # Compare the latest version with the current version
-            if latest_version > current_version and (self.app_settings.settings["ask_for_update"] or force_check):
-                # update
-
-                # Prompt the user to install the update
-                update_choice = messagebox.askyesnocancel(
-                    self._("Update Available"),
-                    self._("A new version ({0}) is available. Do you want to update?").format(latest_version),
-                    icon="question",
-                    default="yes",
-                    parent=self.root,
-                )
-                if update_choice is None:
-                    # User clicked "Aboard" - will ask again next time
-                    pass
-                elif update_choice:
-                    # User clicked "Yes"
-                    self.download_and_run_installer(download_url)
-                else:
-                    # Inform the user that they will not be asked again, but if there is a new version, they can still check manually
-                    # also if there is a newer new version than the one in newest_version_available, they will be asked again
-                    choice = messagebox.askokcancel(
-                        self._("Update Information"),
-                        self._(
-                            "Click 'yes' to not be asked again for this update. You can still check manually for updates. If there is a newer version available, you will be asked again."
-                        ),
-                    )
-                    if choice:
-                        self.app_settings.update_setting("ask_for_update", False)
+        if retry:
+            self.start_update_check(current_version, force_check)
+
+    def _release_update_check_lock(self):
+        """
+        Release the update check lock on the Tk thread and start a forced check if one was requested meanwhile.
+        """
+        self.update_check_lock.release()
+        if self.pending_forced_check:
+            self.pending_forced_check = False
+            self.start_update_check(force_check=True)
+
+    def _prompt_for_update(self, latest_version: Version, download_url: str, current_version: Version, force_check: bool):
+        """
+        Ask the user to install a newer version, or tell them they are up to date if they asked for the check.
+
+        Args:
+            latest_version (Version): The latest version found.
+            download_url (str): The download URL of the installer of the latest version.
+            current_version (Version): The version of the running app.
+            force_check (bool): Whether the user asked for the check.
+        """
+        # Compare the latest version with the current version
+        if latest_version > current_version and (self.app_settings.settings["ask_for_update"] or force_check):
+            # update
+
+            # Prompt the user to install the update
+            update_choice = messagebox.askyesnocancel(
+                self._("Update Available"),
+                self._("A new version ({0}) is available. Do you want to update?").format(latest_version),
+                icon="question",
+                default="yes",
+                parent=self.root,
+            )
+            if update_choice is None:
+                # User clicked "Aboard" - will ask again next time
+                pass
+            elif update_choice:
+                # User clicked "Yes"
+                self.download_and_run_installer(download_url)
             else:
-                if force_check:
-                    # Inform the user that they are already up to date
-                    messagebox.showinfo(self._("Up to Date"), self._("You are already using the latest version."))
-            return latest_version
-        except requests.exceptions.RequestException as e:
-            if force_check:
-                # Handle any errors that occur during the update check
-                choice = messagebox.askretrycancel(self._("Update Error"), self._("Failed to check for updates: {0}").format(str(e)))
+                # Inform the user that they will not be asked again, but if there is a new version, they can still check manually
+                # also if there is a newer new version than the one in newest_version_available, they will be asked again
+                choice = messagebox.askokcancel(
+                    self._("Update Information"),
+                    self._(
+                        "Click 'yes' to not be asked again for this update. You can still check manually for updates. If there is a newer version available, you will be asked again."
+                    ),
+                )
                 if choice:
-                    self.check_for_app_updates(current_version, force_check)
-            else:
-                print(f"Failed to check for updates: {str(e)}")
-            return False
+                    self.app_settings.update_setting("ask_for_update", False)
+        else:
+            if force_check:
+                # Inform the user that they are already up to date
+                messagebox.showinfo(self._("Up to Date"), self._("You are already using the latest version."))
+
+    def _fetch_release_info(self, release_url: str):
+        """
+        Fetches and parses release information from the GitHub API.
+
+        Args:
+            release_url (str): The GitHub API URL to fetch.
+
+        Returns:
+            The parsed JSON response.
+        """
+        # Ask GitHub to only send the response if it changed since the last request.
+        # Unchanged responses come back as an empty "304 Not Modified" which does not count against the rate limit.
+        releases_cache = load_releases_cache()
+        cached_response = releases_cache.get(release_url)
+        headers = {"Accept": "application/vnd.github+json"}
+        if cached_response:
+            headers["If-None-Match"] = cached_response["etag"]
+
+        # Send GET request to GitHub API
+        response = get_http_session().get(release_url, headers=headers, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+
+        if response.status_code == 304 and cached_response:
+            release_info = cached_response["release_info"]
+        else:
+            # Parse the response JSON
+            release_info = response.json()
+            etag = response.headers.get("ETag")
+            if etag:
+                releases_cache[release_url] = {"etag": etag, "release_info": release_info}
+                save_releases_cache(releases_cache)
+
+        return release_info
 
     def download_and_run_installer(self, download_url: str):
         """
@@ -1020,36 +1373,61 @@ class PDFHighlighterApp:
         Args:
             download_url (str): The URL to download the installer from.
         """
-        # Create a temporary file for the installer
-        with tempfile.NamedTemporaryFile(suffix=".exe", delete=False) as temp_file:
-            installer_path = Path(temp_file.name)
+        import subprocess
+        import tempfile
+
+        import requests
+
+        # Create a temporary file for the installer, only its path is needed as it is reopened for the download
+        fd, temp_path = tempfile.mkstemp(suffix=".exe")
+        os.close(fd)
+        installer_path = Path(temp_path)
 
         # Download the installer exe
         try:
-            response = requests.get(download_url, stream=True)
+            response = get_http_session().get(download_url, stream=True, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
 
             total_size_in_bytes = int(response.headers.get("content-length", 0))
-            block_size = 1024  # 1 KB
 
             self.progress_bar["maximum"] = total_size_in_bytes
-            start_time = time.time()
+            start_time = time.monotonic_ns()
+            update_interval = 250_000_000  # Update the GUI every 1/4 second (in nanoseconds)
+            downloaded_bytes = 0
+            bytes_since_update = 0
 
             with open(installer_path, "wb") as file:
-                last_update_time = time.time()
-                for data in response.iter_content(block_size):
+                if total_size_in_bytes:
+                    # Allocate the full size up front instead of growing the file with every chunk
+                    file.truncate(total_size_in_bytes)
+                last_update_time = start_time
+                for data in response.iter_content(DOWNLOAD_CHUNK_SIZE):
                     file.write(data)
-                    self.progress_bar["value"] += len(data)  # Update the progress bar's value
-                    current_time = time.time()
-                    if current_time - last_update_time >= 0.25:  # Update the GUI every 1/4 second
+                    downloaded_bytes += len(data)
+                    bytes_since_update += len(data)
+                    # Only read the clock once enough data has arrived to be worth showing
+                    if bytes_since_update < 1024 * 1024:
+                        continue
+                    current_time = time.monotonic_ns()
+                    if current_time - last_update_time >= update_interval:
+                        self.progress_bar["value"] = downloaded_bytes  # Update the progress bar's value
                         self.update_progress_bar(start_time, total_size_in_bytes)  # Call the method directly
                         last_update_time = current_time
+                        bytes_since_update = 0
+                self.progress_bar["value"] = downloaded_bytes
+                # Cut off any preallocated space that was not written, e.g. after a shortened response
+                file.truncate()
+                file_size = os.fstat(file.fileno()).st_size
 
-            if total_size_in_bytes != 0 and self.progress_bar["value"] != total_size_in_bytes:
-                print("ERROR, something went wrong")
+            # Without a content-length there is nothing to check the download against
+            if total_size_in_bytes and file_size != total_size_in_bytes:
+                raise OSError(f"Downloaded {file_size} of {total_size_in_bytes} bytes")
 
-        except requests.exceptions.HTTPError as e:
+        except (requests.exceptions.RequestException, OSError) as e:
             messagebox.showerror(self._("Error"), self._("Failed to download the installer: {0}").format(str(e)))
+            # Do not hand an incomplete installer to the update script
+            installer_path.unlink(missing_ok=True)
+            return
 
         # Close the application
         self.root.destroy()
@@ -1057,17 +1435,14 @@ class PDFHighlighterApp:
         # Get the current process id
         pid = os.getpid()
 
-        # Create a STARTUPINFO object
-        startupinfo = subprocess.STARTUPINFO()
-
-        # Set the STARTF_USESHOWWINDOW flag
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-        # Run the update script without showing a window
-        subprocess.Popen([UPDATE_SCRIPT_PATH, str(pid), installer_path], startupinfo=startupinfo)
+        # Run the update script without showing a window (show_cmd 0 is SW_HIDE).
+        # The app exits right after this, so there is no need for a subprocess handle to wait on.
+        # The script quotes the installer path itself, so only quote arguments that need it, like Popen does
+        arguments = subprocess.list2cmdline([str(pid), str(installer_path)])
+        os.startfile(UPDATE_SCRIPT_PATH, arguments=arguments, show_cmd=0)
 
     def update_progress_bar(self, start_time, total_size_in_bytes):
-        elapsed_time = time.time() - start_time
+        elapsed_time = (time.monotonic_ns() - start_time) / 1e9
         speed = self.progress_bar["value"] / elapsed_time
         remaining_time = (total_size_in_bytes - self.progress_bar["value"]) / speed
         downloaded_MB = self.progress_bar["value"] / (1024 * 1024)
@@ -1085,38 +1460,50 @@ class PDFHighlighterApp:
 class Tooltip:
     """
     Create a tooltip for a given widget.
+
+    All tooltips share a single window which is withdrawn while no tooltip is shown.
     """
 
+    _shared_tw = None
+    _shared_label = None
+
     def __init__(self, widget: Widget, text: str):
         self.widget = widget
         self.text = text
 
-        # Set up internationalization
-        self.lang = gettext.translation("base", localedir=locales_dir, languages=language_options)
-        self.lang.install()
-        self._ = staticmethod(self.lang.gettext)  # alias for convenience
-
         self.tipwindow = None
         self.id = None
         self.x = self.y = 0
         self.widget.bind("<Enter>", self.show_tip)
         self.widget.bind("<Leave>", self.hide_tip)
 
+    def get_shared_window(self):
+        """Return the shared tooltip window, creating it if it does not exist (anymore)."""
+        tw = Tooltip._shared_tw
+        if tw is None or not tw.winfo_exists():
+            tw = Toplevel(self.widget.winfo_toplevel())
+            tw.wm_overrideredirect(True)
+            tw.withdraw()
+            label = Label(tw, justify=LEFT, background="#ffffe0", relief=SOLID, borderwidth=1, font=("tahoma", "8", "normal"))
+            label.pack(ipadx=1)
+            Tooltip._shared_tw = tw
+            Tooltip._shared_label = label
+        return tw
+
     def show_tip(self, event=None):
         "Display text in tooltip window"
         self.x = self.widget.winfo_rootx() + 20
         self.y = self.widget.winfo_rooty() + self.widget.winfo_height() + 5
-        self.tipwindow = tw = Toplevel(self.widget)
-        tw.wm_overrideredirect(True)
+        self.tipwindow = tw = self.get_shared_window()
+        Tooltip._shared_label.config(text=self.text)
         tw.wm_geometry("+%d+%d" % (self.x, self.y))
-        label = Label(tw, text=self.text, justify=LEFT, background="#ffffe0", relief=SOLID, borderwidth=1, font=("tahoma", "8", "normal"))
-        label.pack(ipadx=1)
+        tw.deiconify()
 
     def hide_tip(self, event=None):
         tw = self.tipwindow
         self.tipwindow = None
         if tw:
-            tw.destroy()
+            tw.withdraw()
 
 
 if __name__ == "__main__":
@@ -1,42 +1,45 @@
 import sys
 import re
+from pathlib import Path
 
 SETUP_PY = "setup.py"
 SETUP_ISS = "setup.iss"
 HEAT_SHEET_PDF_HIGHLIGHTER = "heat_sheet_pdf_highlighter.py"
 
+SETUP_PY_PATTERN = re.compile(r"(version\s*=\s*['\"])([^'\"]+)(['\"])")
+SETUP_ISS_PATTERN = re.compile(r"(#define MyAppVersion\s*['\"])([^'\"]+)(['\"])")
+HEAT_SHEET_PDF_HIGHLIGHTER_PATTERN = re.compile(r"(VERSION_STR\s*=\s*['\"])([^'\"]+)(['\"])")
+VERSION_INPUT_PATTERN = re.compile(r"\d+\.\d+\.\d+")
+
+# The files containing the version and the pattern matching it in each of them
+VERSION_FILES = [
+    (SETUP_PY, SETUP_PY_PATTERN),
+    (SETUP_ISS, SETUP_ISS_PATTERN),
+    (HEAT_SHEET_PDF_HIGHLIGHTER, HEAT_SHEET_PDF_HIGHLIGHTER_PATTERN),
+]
+
 
 def update_version(version):
-    # Update version in setup.py
-    with open(SETUP_PY, "r") as file:
-        setup_content = file.read()
-    setup_content = re.sub(r"(version\s*=\s*['\"])([^'\"]+)(['\"])", r"\g<1>" + version + r"\g<3>", setup_content)
-    with open(SETUP_PY, "w") as file:
-        file.write(setup_content)
-
-    # Update version in setup.iss
-    try:
-        with open(SETUP_ISS, "r") as file:
-            iss_content = file.read()
-        iss_content = re.sub(r"(#define MyAppVersion\s*['\"])([^'\"]+)(['\"])", r"\g<1>" + version + r"\g<3>", iss_content)
-        with open(SETUP_ISS, "w") as file:
-            file.write(iss_content)
-    except Exception as e:
-        print(f"Error updating setup.iss: {e}")
-
-    # Update version in heat_sheet_pdf_highlighter.py
-    try:
-        with open(HEAT_SHEET_PDF_HIGHLIGHTER, "r") as file:
-            gui_content = file.read()
-        gui_content = re.sub(r"(VERSION_STR\s*=\s*['\"])([^'\"]+)(['\"])", r"\g<1>" + version + r"\g<3>", gui_content)
-        with open(HEAT_SHEET_PDF_HIGHLIGHTER, "w") as file:
-            file.write(gui_content)
-    except Exception as e:
-        print(f"Error updating heat_sheet_pdf_highlighter.py: {e}")
+    """Update the version in all VERSION_FILES and return whether every file was updated."""
+    # Replace the version between the quotes, a function avoids parsing a replacement template for every file
+    def replace_version(match):
+        return match.group(1) + version + match.group(3)
+
+    # Update the version in setup.py, setup.iss and heat_sheet_pdf_highlighter.py
+    success = True
+    for file_name, pattern in VERSION_FILES:
+        try:
+            path = Path(file_name)
+            content = pattern.sub(replace_version, path.read_text())
+            path.write_text(content)
+        except OSError as e:
+            print(f"Error updating {file_name}: {e}")
+            success = False
+    return success
 
 
 def check_version_input(version):
-    if not re.match(r"\d+\.\d+\.\d+", version):
+    if not VERSION_INPUT_PATTERN.match(version):
         print("Invalid version format. Please use the format x.y.z.")
         sys.exit(1)
 
@@ -49,5 +52,7 @@ if __name__ == "__main__":
         version = input("Enter the new version: ")
         check_version_input(version)
 
-    update_version(version)
+    if not update_version(version):
+        print("Version update failed.")
+        sys.exit(1)
     print("Version updated successfully.")